@@ -4,13 +4,33 @@ Click-based CLI commands for Chroni version control system.
 
 import click
 import os
-from core.tracker import Tracker
-from core.scanner import Scanner
-from core.restore import Restorer
-from core.snapshot import SnapshotManager
+from functools import lru_cache
 from db.schema import init_database
 from utils.paths import resolve_path
 
+# Managers are imported and constructed on first use, so one-shot
+# commands only pay for the pieces they actually touch
+
+@lru_cache(maxsize=None)
+def _tracker():
+    from core.tracker import Tracker
+    return Tracker()
+
+@lru_cache(maxsize=None)
+def _scanner():
+    from core.scanner import Scanner
+    return Scanner()
+
+@lru_cache(maxsize=None)
+def _restorer():
+    from core.restore import Restorer
+    return Restorer()
+
+@lru_cache(maxsize=None)
+def _snapshot_manager():
+    from core.snapshot import SnapshotManager
+    return SnapshotManager()
+
 @click.group()
 @click.pass_context
 def cli(ctx):
@@ -18,12 +38,12 @@ def cli(ctx):
     # Initialize database on first run
     init_database()
 
-    # Set up context
+    # Set up context with lazy factories
     ctx.ensure_object(dict)
-    ctx.obj['tracker'] = Tracker()
-    ctx.obj['scanner'] = Scanner()
-    ctx.obj['restorer'] = Restorer()
-    ctx.obj['snapshot_manager'] = SnapshotManager()
+    ctx.obj['tracker'] = _tracker
+    ctx.obj['scanner'] = _scanner
+    ctx.obj['restorer'] = _restorer
+    ctx.obj['snapshot_manager'] = _snapshot_manager
 
 @cli.command()
 @click.argument('paths', nargs=-1, required=True)
@@ -36,7 +56,7 @@ def track(ctx, paths):
             click.echo(f"Error: Path '{path}' does not exist.")
             return
 
-        tracker = ctx.obj['tracker']
+        tracker = ctx.obj['tracker']()
         if tracker.track_path(abs_path):
             click.echo(f"Now tracking: {path}")
         else:
@@ -54,7 +74,7 @@ def untrack(ctx, paths):
             click.echo(f"Error: Path '{path}' does not exist.")
             return
 
-        tracker = ctx.obj['tracker']
+        tracker = ctx.obj['tracker']()
         if tracker.untrack_path(abs_path):
             click.echo(f"Stopped tracking: {path}")
         else:
@@ -72,7 +92,7 @@ def forget(ctx, paths):
             click.echo(f"Error: Path '{path}' does not exist.")
             return
 
-        tracker = ctx.obj['tracker']
+        tracker = ctx.obj['tracker']()
         if tracker.forget_path(abs_path):
             click.echo(f"Removed all history for: {path}")
         else:
@@ -83,7 +103,7 @@ def forget(ctx, paths):
 @click.pass_context
 def list(ctx):
     """List tracked files/folders."""
-    tracker = ctx.obj['tracker']
+    tracker = ctx.obj['tracker']()
     tracked_items = tracker.list_tracked()
 
     if not tracked_items:
@@ -98,7 +118,7 @@ def list(ctx):
 @click.pass_context
 def scan(ctx):
     """Scan for changes and store diffs."""
-    scanner = ctx.obj['scanner']
+    scanner = ctx.obj['scanner']()
     changes = scanner.scan_all()
 
     if not changes:
@@ -116,7 +136,7 @@ def scan(ctx):
 def restore(ctx, path, ver):
     """Restore a file to specific version."""
     abs_path = resolve_path(path)
-    restorer = ctx.obj['restorer']
+    restorer = ctx.obj['restorer']()
 
     if restorer.restore_file(abs_path, ver):
         click.echo(f"Restored {path} to version {ver}")
@@ -129,7 +149,7 @@ def restore(ctx, path, ver):
 @click.pass_context
 def snapshot_create(ctx, name, note):
     """Create a named snapshot of the current state."""
-    snapshot_manager = ctx.obj['snapshot_manager']
+    snapshot_manager = ctx.obj['snapshot_manager']()
 
     if snapshot_manager.create_snapshot(name, note):
         click.echo(f"Created snapshot: {name}")
@@ -140,7 +160,7 @@ def snapshot_create(ctx, name, note):
 @click.pass_context
 def snapshot_list(ctx):
     """List all snapshots."""
-    snapshot_manager = ctx.obj['snapshot_manager']
+    snapshot_manager = ctx.obj['snapshot_manager']()
     snapshots = snapshot_manager.list_snapshots()
 
     if not snapshots:
@@ -157,7 +177,7 @@ def snapshot_list(ctx):
 @click.pass_context
 def snapshot_restore(ctx, name):
     """Restore all files to a snapshot state."""
-    snapshot_manager = ctx.obj['snapshot_manager']
+    snapshot_manager = ctx.obj['snapshot_manager']()
 
     if snapshot_manager.restore_snapshot(name):
         click.echo(f"Restored to snapshot: {name}")
@@ -188,10 +208,12 @@ def history(ctx, path, limit):
         click.echo(f"Version {version['version']} - {version['formatted_timestamp']}")
         if version['diff']:
             click.echo("  Changes:")
-            for line in version['diff'].split('\n')[:5]:  # Show first 5 lines of diff
+            # Split once, and only as far as needed to show 5 lines
+            lines = version['diff'].split('\n', 5)
+            for line in lines[:5]:
                 if line.strip():
                     click.echo(f"    {line}")
-            if len(version['diff'].split('\n')) > 5:
+            if len(lines) > 5:
                 click.echo("    ...")
         click.echo()
 
@@ -238,7 +260,7 @@ def restore_date(ctx, path, date):
 
     abs_path = resolve_path(path)
     history_viewer = HistoryViewer()
-    restorer = ctx.obj['restorer']
+    restorer = ctx.obj['restorer']()
 
     version = history_viewer.find_version_by_date(abs_path, date)
 
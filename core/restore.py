@@ -3,58 +3,83 @@ File restoration functionality.
 """
 
 import os
-from db.access import DatabaseAccess
+from functools import lru_cache
+from db.access import get_db
 from storage.files import FileStorage
 from storage.diffs import DiffStorage
 
+@lru_cache(maxsize=128)
+def _reconstruct_content_cached(file_path, target_version):
+    """
+    Reconstruct file content for a specific version by replaying diffs
+    from the nearest keyframe at or before it. Stored versions are
+    immutable, so results can be cached across restores; the cache is
+    dropped when history is deleted (see invalidate_reconstruction_cache).
+    """
+    db = get_db()
+    diff_storage = DiffStorage()
+
+    # Only fetch rows from the latest full-content keyframe onwards
+    versions = db.get_versions_since_keyframe(file_path, target_version)
+
+    if not versions:
+        return ""
+
+    # Start with the keyframe (has full content)
+    content = versions[0]['content'] or ""
+
+    # Apply diffs sequentially
+    for version in versions[1:]:
+        if version['diff']:
+            content = diff_storage.apply_diff(content, version['diff'])
+
+    return content
+
+def reconstruct_content(file_path, version):
+    """Get the full content of a version, rebuilding delta-only rows."""
+    return _reconstruct_content_cached(file_path, version)
+
+def invalidate_reconstruction_cache():
+    """Drop cached reconstructions after history has been removed."""
+    _reconstruct_content_cached.cache_clear()
+
 class Restorer:
     def __init__(self):
-        self.db = DatabaseAccess()
+        self.db = get_db()
         self.file_storage = FileStorage()
         self.diff_storage = DiffStorage()
-    
+
     def restore_file(self, file_path, version):
         """
         Restore a file to a specific version.
         Returns True if successful, False otherwise.
         """
         file_version = self.db.get_file_version(file_path, version)
-        
+
         if file_version is None:
             return False
-        
+
+        return self.restore_prefetched(file_path, version, file_version['content'])
+
+    def restore_prefetched(self, file_path, version, content):
+        """
+        Restore a file from an already-fetched version row.
+        Returns True if successful, False otherwise.
+        """
         try:
-            # If this version has full content, use it directly
-            if file_version['content']:
-                content = file_version['content']
-            else:
-                # Reconstruct content from diffs
+            # If the row has no full content, reconstruct it from diffs
+            if not content:
                 content = self._reconstruct_content(file_path, version)
-            
+
             # Write the content to the file
             self.file_storage.write_file(file_path, content)
             return True
-        
+
         except Exception:
             return False
-    
+
     def _reconstruct_content(self, file_path, target_version):
         """
         Reconstruct file content for a specific version using diffs.
         """
-        # Get all versions up to target version
-        versions = self.db.get_file_versions_up_to(file_path, target_version)
-        
-        if not versions:
-            return ""
-        
-        # Start with the first version (should have full content)
-        content = versions[0]['content']
-        
-        # Apply diffs sequentially
-        for i in range(1, len(versions)):
-            version = versions[i]
-            if version['diff']:
-                content = self.diff_storage.apply_diff(content, version['diff'])
-        
-        return content
\ No newline at end of file
+        return _reconstruct_content_cached(file_path, target_version)
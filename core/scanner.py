@@ -3,16 +3,24 @@ File scanning and change detection functionality.
 """
 
 import os
-from db.access import DatabaseAccess
+import stat as stat_module
+from concurrent.futures import ThreadPoolExecutor
+from core.restore import reconstruct_content
+from core.versioning import is_keyframe
+from db.access import get_db
 from storage.files import FileStorage
 from storage.diffs import DiffStorage
+from utils.hashing import hash_file
 from utils.time import get_timestamp
 
 class Scanner:
     def __init__(self):
-        self.db = DatabaseAccess()
+        self.db = get_db()
         self.file_storage = FileStorage()
         self.diff_storage = DiffStorage()
+        # Last seen (st_mtime_ns, st_size) per path, to skip reading
+        # files that have not been touched since the previous scan
+        self._stat_cache = {}
 
     def scan_all(self):
         """
@@ -20,70 +28,135 @@ class Scanner:
         Returns list of changed files.
         """
         tracked_items = self.db.get_tracked_items()
-        changes = []
+        all_files, stats = self._collect_files(tracked_items)
+
+        # One query for the latest version of every file, instead of a
+        # round-trip per file inside _scan_file
+        latest_metas = self.db.get_latest_versions_bulk(all_files)
+
+        # Reading, hashing and diffing are independent per file and
+        # release the GIL, so fan out across a thread pool and write
+        # all new versions back in a single transaction
+        max_workers = min(32, (os.cpu_count() or 1) * 4)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(
+                self._scan_file,
+                all_files,
+                (latest_metas.get(f) for f in all_files),
+                (stats.get(f) for f in all_files)
+            )
+            new_rows = [row for row in results if row is not None]
+
+        if new_rows:
+            self.db.add_file_versions_bulk(new_rows)
+
+        return [row[0] for row in new_rows]
+
+    def _collect_files(self, tracked_items):
+        """
+        Expand tracked paths into a flat list of files to scan.
+        Returns the list plus the stat results gathered on the way, so
+        _scan_file doesn't have to stat those paths again.
+        """
+        from utils.paths import get_text_files_in_directory
+
+        tracked_set = set(tracked_items)
+        all_files = []
+        stats = {}
+        seen = set()
 
         for path in tracked_items:
-            if os.path.isfile(path):
-                if self._scan_file(path):
-                    changes.append(path)
-            elif os.path.isdir(path):
-                # Scan all files in directory
-                from utils.paths import get_text_files_in_directory
-                text_files = get_text_files_in_directory(path)
-                for file_path in text_files:
-                    if self.db.is_tracked(file_path) and self._scan_file(file_path):
-                        changes.append(file_path)
-
-        return changes
+            # One stat answers both the file and directory checks
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+
+            if stat_module.S_ISREG(stat.st_mode):
+                if path not in seen:
+                    seen.add(path)
+                    all_files.append(path)
+                    stats[path] = stat
+            elif stat_module.S_ISDIR(stat.st_mode):
+                for file_path in get_text_files_in_directory(path):
+                    if file_path in tracked_set and file_path not in seen:
+                        seen.add(file_path)
+                        all_files.append(file_path)
+
+        return all_files, stats
 
     def handle_file_change(self, file_path):
         # logic from scan(ctx) but just for one file
         # get latest version, diff it, and store
-        self._scan_file(file_path)
+        row = self._scan_file(file_path, self.db.get_latest_version_meta(file_path))
+        if row is not None:
+            self.db.add_file_version(*row)
 
-    def _scan_file(self, file_path):
+    def _scan_file(self, file_path, latest_meta, stat=None):
         """
-        Scan a single file for changes.
-        Returns True if changes were detected and stored.
+        Scan a single file for changes, without writing to the database.
+        Returns the new version row to insert, or None if unchanged.
         """
-        if not os.path.exists(file_path):
-            return False
+        if stat is None:
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                return None
+
+        # If mtime and size match the last scan, the file can't have
+        # changed - skip it without reading a byte
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        if self._stat_cache.get(file_path) == stat_key:
+            return None
+
+        # Hash the raw bytes in chunks - unchanged files never get
+        # loaded into memory at all
+        try:
+            current_hash = hash_file(file_path)
+        except OSError:
+            return None
+
+        self._stat_cache[file_path] = stat_key
+
+        if latest_meta is not None and latest_meta['content_hash'] == current_hash:
+            return None
 
+        # New or changed: now the full content is actually needed
         try:
             current_content = self.file_storage.read_file(file_path)
         except Exception:
-            return False
+            return None
+
+        if latest_meta is None:
+            # First time tracking this file
+            return self._build_initial_version(file_path, current_content, current_hash)
 
-        # Get the latest version
         latest_version = self.db.get_latest_version(file_path)
 
-        if latest_version is None:
-            # First time tracking this file
-            self._store_initial_version(file_path, current_content)
-            return True
+        # Delta-only rows store no content; rebuild it so the diff has
+        # a real basis to compare against
+        if latest_version['content'] is None:
+            latest_version['content'] = reconstruct_content(
+                file_path, latest_version['version']
+            )
 
-        # Check if content has changed
-        if current_content != latest_version['content']:
-            self._store_new_version(file_path, current_content, latest_version)
-            return True
+        # The content can still match when the stored row predates
+        # hashing or was hashed over decoded text - compare before
+        # storing a spurious version
+        if current_content == latest_version['content']:
+            return None
 
-        return False
+        return self._build_new_version(file_path, current_content, current_hash, latest_version)
 
-    def _store_initial_version(self, file_path, content):
-        """Store the initial version of a file."""
+    def _build_initial_version(self, file_path, content, content_hash):
+        """Build the initial version row for a file."""
         version = 1
         timestamp = get_timestamp()
 
-        self.db.add_file_version(
-            path=file_path,
-            version=version,
-            diff=None,
-            content=content,
-            timestamp=timestamp
-        )
+        return (file_path, version, None, content, timestamp, content_hash)
 
-    def _store_new_version(self, file_path, new_content, previous_version):
-        """Store a new version of a file with diff."""
+    def _build_new_version(self, file_path, new_content, content_hash, previous_version):
+        """Build a new version row for a file, with diff."""
         version = previous_version['version'] + 1
         timestamp = get_timestamp()
 
@@ -93,10 +166,8 @@ class Scanner:
             new_content
         )
 
-        self.db.add_file_version(
-            path=file_path,
-            version=version,
-            diff=diff,
-            content=new_content,
-            timestamp=timestamp
-        )
+        # Full content is only kept on keyframes; other rows carry the
+        # diff alone and are reconstructed on read
+        content = new_content if is_keyframe(version) else None
+
+        return (file_path, version, diff, content, timestamp, content_hash)
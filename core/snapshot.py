@@ -2,13 +2,13 @@
 Snapshot management functionality.
 """
 
-from db.access import DatabaseAccess
+from db.access import get_db
 from core.restore import Restorer
 from utils.time import get_timestamp
 
 class SnapshotManager:
     def __init__(self):
-        self.db = DatabaseAccess()
+        self.db = get_db()
         self.restorer = Restorer()
     
     def create_snapshot(self, name, note=None):
@@ -19,25 +19,15 @@ class SnapshotManager:
         # Check if snapshot name already exists
         if self.db.snapshot_exists(name):
             return False
-        
-        # Get current version of all tracked files
-        tracked_items = self.db.get_tracked_items()
-        file_versions = {}
-        
-        for path in tracked_items:
-            if self.db.is_file_tracked(path):
-                latest_version = self.db.get_latest_version(path)
-                if latest_version:
-                    file_versions[path] = latest_version['version']
-        
+
         # Create snapshot
         timestamp = get_timestamp()
         self.db.create_snapshot(name, note, timestamp)
-        
-        # Store file versions for this snapshot
-        for path, version in file_versions.items():
-            self.db.add_snapshot_file(name, path, version)
-        
+
+        # One INSERT ... SELECT writes the snapshot rows straight from
+        # database state, instead of three queries per tracked file
+        self.db.add_snapshot_files_from_latest(name)
+
         return True
     
     def list_snapshots(self):
@@ -49,15 +39,22 @@ class SnapshotManager:
         Restore all files to a snapshot state.
         Returns True if successful, False otherwise.
         """
-        snapshot_files = self.db.get_snapshot_files(name)
-        
+        # Fetch every file's version row in one query rather than one
+        # lookup per file during the restore loop
+        snapshot_files = self.db.get_snapshot_file_versions(name)
+
         if not snapshot_files:
             return False
-        
+
         # Restore each file to its snapshot version
         success = True
         for file_info in snapshot_files:
-            if not self.restorer.restore_file(file_info['path'], file_info['version']):
+            restored = self.restorer.restore_prefetched(
+                file_info['path'],
+                file_info['version'],
+                file_info['content']
+            )
+            if not restored:
                 success = False
-        
+
         return success
\ No newline at end of file
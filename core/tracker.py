@@ -3,31 +3,35 @@ File and folder tracking functionality.
 """
 
 import os
-from db.access import DatabaseAccess
+from db.access import get_db
 from utils.paths import get_text_files_in_directory, get_tracked_paths_file
 
 class Tracker:
     def __init__(self):
-        self.db = DatabaseAccess()
+        self.db = get_db()
 
     def track_path(self, path):
         """
         Start tracking a file or folder.
         Returns True if newly tracked, False if already tracked.
         """
-        if self.is_tracked(path):
+        # The UPSERT reports whether the path was new, so no separate
+        # is_tracked round-trip is needed
+        if not self.db.add_tracked_item(path):
             return False
 
-        self.db.add_tracked_item(path)
+        new_paths = [path]
 
         # If it's a directory, track all text files in it
         if os.path.isdir(path):
             text_files = get_text_files_in_directory(path)
-            for file_path in text_files:
-                if not self.is_tracked(file_path):
-                    self.db.add_tracked_item(file_path)
+            new_files = self.db.filter_untracked(text_files)
+            self.db.add_tracked_items_bulk(new_files)
+            new_paths.extend(new_files)
 
-        self.write_tracked_paths(self.db.get_tracked_items())
+        # The database is the source of truth; the mirror file only
+        # needs the additions appended, not a full rewrite
+        self.append_tracked_paths(new_paths)
 
         return True
 
@@ -41,12 +45,11 @@ class Tracker:
 
         self.db.deactivate_tracked_item(path)
 
-        # If it's a directory, untrack all files in it
+        # If it's a directory, untrack all files in it (deactivating
+        # an untracked path is a no-op, so no per-file checks needed)
         if os.path.isdir(path):
             text_files = get_text_files_in_directory(path)
-            for file_path in text_files:
-                if self.is_tracked(file_path):
-                    self.db.deactivate_tracked_item(file_path)
+            self.db.deactivate_tracked_items_bulk(text_files)
 
         self.write_tracked_paths(self.db.get_tracked_items())
 
@@ -62,12 +65,15 @@ class Tracker:
 
         self.db.remove_all_history(path)
 
-        # If it's a directory, forget all files in it
+        # If it's a directory, forget all files in it (deleting paths
+        # with no history is a no-op, so no per-file checks needed)
         if os.path.isdir(path):
             text_files = get_text_files_in_directory(path)
-            for file_path in text_files:
-                if self.db.path_exists_in_history(file_path):
-                    self.db.remove_all_history(file_path)
+            self.db.remove_all_history_bulk(text_files)
+
+        # Cached reconstructions for the forgotten versions are stale now
+        from core.restore import invalidate_reconstruction_cache
+        invalidate_reconstruction_cache()
 
         return True
 
@@ -83,12 +89,16 @@ class Tracker:
 
     def read_tracked_paths(self):
         try:
-            file = open(get_tracked_paths_file(), 'r')
+            with open(get_tracked_paths_file(), 'r') as file:
+                return [line.strip() for line in file if line.strip()]
         except FileNotFoundError:
             return []
-        return [line.strip() for line in file.readlines() if line.strip()]
 
     def write_tracked_paths(self, paths):
-        file = open(get_tracked_paths_file(), 'w')
-        file.write("\n".join(sorted(set(paths))) + "\n")
-        file.close()
+        with open(get_tracked_paths_file(), 'w') as file:
+            file.write("\n".join(sorted(set(paths))) + "\n")
+
+    def append_tracked_paths(self, paths):
+        """Append newly tracked paths without rewriting the whole file."""
+        with open(get_tracked_paths_file(), 'a') as file:
+            file.writelines(path + "\n" for path in paths)
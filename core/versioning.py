@@ -0,0 +1,11 @@
+"""
+Versioning policy for diff-based storage.
+"""
+
+# Every KEYFRAME_INTERVAL-th version keeps full content, so a restore
+# replays at most KEYFRAME_INTERVAL - 1 diffs from the nearest keyframe
+KEYFRAME_INTERVAL = 16
+
+def is_keyframe(version):
+    """Check whether a version number should store full content."""
+    return version == 1 or version % KEYFRAME_INTERVAL == 0
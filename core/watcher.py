@@ -1,3 +1,5 @@
+import os
+import threading
 import time
 from pathlib import Path
 from watchdog.observers import Observer
@@ -6,21 +8,89 @@ from core.scanner import Scanner
 from utils.paths import get_tracked_paths_file
 from core.tracker import Tracker
 
+# Process a path this long after its last event quiets down ...
+DEBOUNCE_SECONDS = 0.05
+# ... but never hold it back longer than this under a steady stream
+MAX_DELAY_SECONDS = 0.5
+
+class DebouncedDispatcher:
+    """
+    Coalesce bursts of events per path before invoking a callback.
+    A single editor save emits several create/modify events back to
+    back; only one diff and database write is needed for the lot.
+    """
+    def __init__(self, callback):
+        self.callback = callback
+        self._lock = threading.Lock()
+        # path -> (first event time, latest event time)
+        self._pending = {}
+        self._wakeup = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, path):
+        now = time.monotonic()
+        with self._lock:
+            first, _ = self._pending.get(path, (now, now))
+            self._pending[path] = (first, now)
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            time.sleep(DEBOUNCE_SECONDS)
+
+            now = time.monotonic()
+            due = []
+            with self._lock:
+                for path, (first, last) in list(self._pending.items()):
+                    if now - last >= DEBOUNCE_SECONDS or now - first >= MAX_DELAY_SECONDS:
+                        del self._pending[path]
+                        due.append(path)
+                if not self._pending:
+                    self._wakeup.clear()
+
+            for path in due:
+                self.callback(path)
+
+
 class ChroniEventHandler(FileSystemEventHandler):
     def __init__(self, scanner: Scanner):
         self.scanner = scanner
+        self._dispatcher = DebouncedDispatcher(scanner.handle_file_change)
+        self.tracked_files = set()
+        self.tracked_dirs = []
+        from utils.paths import get_excluded_dirs
+        self._excluded_dirs = set(get_excluded_dirs())
+
+    def set_watched_paths(self, files, dirs):
+        """Tell the handler which paths events should be acted on for."""
+        self.tracked_files = set(files)
+        self.tracked_dirs = [d.rstrip(os.sep) + os.sep for d in dirs]
+
+    def _should_handle(self, path):
+        # Watching a parent directory delivers events for untracked
+        # siblings too; only tracked files and files under tracked
+        # directories (outside excluded subtrees) get processed
+        if path in self.tracked_files:
+            return True
+        for tracked_dir in self.tracked_dirs:
+            if path.startswith(tracked_dir):
+                parents = path[len(tracked_dir):].split(os.sep)[:-1]
+                return not any(name in self._excluded_dirs for name in parents)
+        return False
 
     def on_modified(self, event):
-        if not event.is_directory:
-            self.scanner.handle_file_change(event.src_path)
+        if not event.is_directory and self._should_handle(event.src_path):
+            self._dispatcher.submit(event.src_path)
 
     def on_created(self, event):
-        if not event.is_directory:
-            self.scanner.handle_file_change(event.src_path)
+        if not event.is_directory and self._should_handle(event.src_path):
+            self._dispatcher.submit(event.src_path)
 
     def on_deleted(self, event):
-        if not event.is_directory:
-            self.scanner.handle_file_change(event.src_path)
+        if not event.is_directory and self._should_handle(event.src_path):
+            self._dispatcher.submit(event.src_path)
 
 
 class TrackedPathsWatcher(FileSystemEventHandler):
@@ -29,6 +99,8 @@ class TrackedPathsWatcher(FileSystemEventHandler):
         self.observer = observer
         self.main_handler = main_handler
         self.tracked_file = get_tracked_paths_file()
+        # Resolved once; comparing against it per event needs no syscalls
+        self._tracked_file_resolved = Path(self.tracked_file).resolve()
         self.current_paths = set()
         self._init_tracked_paths()
 
@@ -37,10 +109,38 @@ class TrackedPathsWatcher(FileSystemEventHandler):
         self._schedule_all()
 
     def _schedule_all(self):
+        # Tracked single files share one non-recursive watch on their
+        # parent directory instead of a watch apiece; the handler
+        # filters out events for untracked siblings
+        tracked_files = set()
+        tracked_dirs = []
+        parent_dirs = set()
+
         for path in self.current_paths:
             p = Path(path)
-            if p.exists():
-                self.observer.schedule(self.main_handler, path=path, recursive=p.is_dir())
+            if not p.exists():
+                continue
+            if p.is_dir():
+                tracked_dirs.append(path)
+            else:
+                tracked_files.add(path)
+                parent_dirs.add(str(p.parent))
+
+        self.main_handler.set_watched_paths(tracked_files, tracked_dirs)
+
+        for path in tracked_dirs:
+            self.observer.schedule(self.main_handler, path=path, recursive=True)
+
+        # Files inside a tracked directory are already covered by its
+        # recursive watch; only uncovered parents need a watch of their own
+        dir_prefixes = [d.rstrip(os.sep) + os.sep for d in tracked_dirs]
+        for path in parent_dirs:
+            covered = any(
+                path + os.sep == prefix or (path + os.sep).startswith(prefix)
+                for prefix in dir_prefixes
+            )
+            if not covered:
+                self.observer.schedule(self.main_handler, path=path, recursive=False)
 
     def _unschedule_all(self):
         self.observer.unschedule_all()
@@ -54,27 +154,23 @@ class TrackedPathsWatcher(FileSystemEventHandler):
         self.observer.schedule(self, path=str(self.tracked_file), recursive=False)
 
     def on_modified(self, event):
-        print('modified')
-        if Path(event.src_path).resolve() == Path(self.tracked_file):
+        if Path(event.src_path).resolve() == self._tracked_file_resolved:
             self._reload_tracked_paths()
         else:
             self.main_handler.on_modified(event)
 
     def on_created(self, event):
-        print('created')
-        if Path(event.src_path).resolve() == Path(self.tracked_file):
+        if Path(event.src_path).resolve() == self._tracked_file_resolved:
             self._reload_tracked_paths()
         else:
             self.main_handler.on_created(event)
 
     def on_deleted(self, event):
-        print('deleted')
-        if Path(event.src_path).resolve() != Path(self.tracked_file):
+        if Path(event.src_path).resolve() != self._tracked_file_resolved:
             self.main_handler.on_deleted(event)
 
     def on_moved(self, event):
-        print('moved')
-        if Path(event.src_path).resolve() == Path(self.tracked_file):
+        if Path(event.src_path).resolve() == self._tracked_file_resolved:
             self._reload_tracked_paths()
         else:
             self.main_handler.on_moved(event)
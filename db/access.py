@@ -3,27 +3,152 @@ Database access layer for Chroni version control system.
 """
 
 import sqlite3
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from storage.layout import encode_payload, decode_payload
 from utils.paths import get_db_path
 
+# SQLite's default limit on bound parameters is 999; stay under it
+# when expanding IN (...) clauses
+_MAX_QUERY_PARAMS = 900
+
+# Bound on cached latest-version rows; evicted least-recently-used
+_LATEST_CACHE_SIZE = 4096
+
+@lru_cache(maxsize=64)
+def _placeholders(count):
+    """Build a cached '?, ?, ...' placeholder list for IN clauses."""
+    return ', '.join(['?'] * count)
+
+_shared_db = None
+
+def get_db():
+    """
+    Get the process-wide shared DatabaseAccess instance, so all managers
+    reuse one connection instead of opening their own.
+    """
+    global _shared_db
+    if _shared_db is None:
+        _shared_db = DatabaseAccess()
+    return _shared_db
+
 class DatabaseAccess:
     def __init__(self):
         self.db_path = get_db_path()
-    
+        self._conn = None
+        # LRU of get_latest_version rows, invalidated per path when a
+        # new version lands or history is deleted
+        self._latest_cache = OrderedDict()
+        # Path string -> integer id; ids are stable for the lifetime
+        # of the database so this never needs invalidating
+        self._path_ids = {}
+        # All paths known to history, loaded once on first membership
+        # check so repeated exists-queries never hit SQLite
+        self._history_paths = None
+
+    def _database_uri(self, mode='rwc'):
+        """Build a file: URI for the database, encoding odd path characters."""
+        return Path(self.db_path).as_uri() + f'?mode={mode}'
+
     def _get_connection(self):
-        """Get database connection."""
-        return sqlite3.connect(self.db_path)
+        """Get the shared database connection, opening it on first use."""
+        if self._conn is None:
+            # A persistent connection keeps SQLite's prepared-statement
+            # cache warm across calls; WAL avoids rewriting the journal
+            # on every commit and lets other processes read while this
+            # one writes. The URI form allows mode=ro opens elsewhere.
+            self._conn = sqlite3.connect(
+                self._database_uri(),
+                uri=True,
+                cached_statements=512,
+                check_same_thread=False
+            )
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute('PRAGMA busy_timeout=5000')
+            # Keep sorts and temp tables off disk, and give hot pages a
+            # bigger cache (~20 MB) plus mmap'd reads for large scans
+            self._conn.execute('PRAGMA temp_store=MEMORY')
+            self._conn.execute('PRAGMA cache_size=-20000')
+            self._conn.execute('PRAGMA mmap_size=268435456')
+        return self._conn
+
+    def _get_path_id(self, path, create=False):
+        """
+        Get the integer id for a path, optionally creating one. Returns
+        None for unknown paths when create is False.
+        """
+        path_id = self._path_ids.get(path)
+        if path_id is not None:
+            return path_id
+
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT id FROM paths WHERE path = ?', (path,))
+        result = cursor.fetchone()
+
+        if result is not None:
+            path_id = result[0]
+        elif create:
+            cursor.execute('INSERT INTO paths (path) VALUES (?)', (path,))
+            path_id = cursor.lastrowid
+        else:
+            return None
+
+        self._path_ids[path] = path_id
+        return path_id
     
     def add_tracked_item(self, path):
-        """Add a path to tracked items."""
+        """
+        Add a path to tracked items, reactivating it if already known.
+        Returns True if the path was not actively tracked before.
+        """
         conn = self._get_connection()
         cursor = conn.cursor()
+        # UPSERT answers "was this new?" in the same round-trip: the
+        # WHERE clause filters out rows that were already active, so
+        # rowcount is 0 exactly when the path was tracked already
         cursor.execute(
-            'INSERT OR REPLACE INTO tracked_items (path, active) VALUES (?, 1)',
+            'INSERT INTO tracked_items (path, active) VALUES (?, 1) '
+            'ON CONFLICT(path) DO UPDATE SET active = 1 WHERE active = 0',
             (path,)
         )
         conn.commit()
-        conn.close()
+        if self._history_paths is not None:
+            self._history_paths.add(path)
+        return cursor.rowcount > 0
     
+    def add_tracked_items_bulk(self, paths):
+        """Add many paths to tracked items in a single transaction."""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.executemany(
+            'INSERT OR REPLACE INTO tracked_items (path, active) VALUES (?, 1)',
+            ((path,) for path in paths)
+        )
+        conn.commit()
+        if self._history_paths is not None:
+            self._history_paths.update(paths)
+
+    def filter_untracked(self, paths):
+        """Return the subset of paths that are not actively tracked."""
+        untracked = []
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        for start in range(0, len(paths), _MAX_QUERY_PARAMS):
+            batch = paths[start:start + _MAX_QUERY_PARAMS]
+            cursor.execute(
+                'SELECT path FROM tracked_items WHERE active = 1 '
+                f'AND path IN ({_placeholders(len(batch))})',
+                batch
+            )
+            tracked = {row[0] for row in cursor.fetchall()}
+            untracked.extend(path for path in batch if path not in tracked)
+
+        return untracked
+
     def deactivate_tracked_item(self, path):
         """Deactivate a tracked item."""
         conn = self._get_connection()
@@ -33,10 +158,24 @@ class DatabaseAccess:
             (path,)
         )
         conn.commit()
-        conn.close()
     
+    def deactivate_tracked_items_bulk(self, paths):
+        """Deactivate many tracked items in a single transaction."""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        for start in range(0, len(paths), _MAX_QUERY_PARAMS):
+            batch = paths[start:start + _MAX_QUERY_PARAMS]
+            cursor.execute(
+                f'UPDATE tracked_items SET active = 0 WHERE path IN ({_placeholders(len(batch))})',
+                batch
+            )
+
+        conn.commit()
+
     def remove_all_history(self, path):
         """Remove all history for a path."""
+        self._latest_cache.pop(path, None)
         conn = self._get_connection()
         cursor = conn.cursor()
         
@@ -44,37 +183,75 @@ class DatabaseAccess:
         cursor.execute('DELETE FROM tracked_items WHERE path = ?', (path,))
         
         # Remove file versions
-        cursor.execute('DELETE FROM file_versions WHERE path = ?', (path,))
+        cursor.execute(
+            'DELETE FROM file_versions WHERE path_id = (SELECT id FROM paths WHERE path = ?)',
+            (path,)
+        )
         
         # Remove from snapshot files
         cursor.execute('DELETE FROM snapshot_files WHERE path = ?', (path,))
-        
+
         conn.commit()
-        conn.close()
+        if self._history_paths is not None:
+            self._history_paths.discard(path)
     
-    def is_tracked(self, path):
-        """Check if a path is actively tracked."""
+    def remove_all_history_bulk(self, paths):
+        """Remove all history for many paths in a single transaction."""
+        for path in paths:
+            self._latest_cache.pop(path, None)
         conn = self._get_connection()
         cursor = conn.cursor()
-        cursor.execute(
-            'SELECT 1 FROM tracked_items WHERE path = ? AND active = 1',
-            (path,)
-        )
+
+        for start in range(0, len(paths), _MAX_QUERY_PARAMS):
+            batch = paths[start:start + _MAX_QUERY_PARAMS]
+            placeholders = _placeholders(len(batch))
+            cursor.execute(f'DELETE FROM tracked_items WHERE path IN ({placeholders})', batch)
+            cursor.execute(
+                f'DELETE FROM file_versions WHERE path_id IN (SELECT id FROM paths WHERE path IN ({placeholders}))',
+                batch
+            )
+            cursor.execute(f'DELETE FROM snapshot_files WHERE path IN ({placeholders})', batch)
+
+        conn.commit()
+        if self._history_paths is not None:
+            self._history_paths.difference_update(paths)
+
+    def get_tracked_status(self, path):
+        """
+        Get (exists in history, actively tracked) for a path from a
+        single indexed lookup.
+        """
+        # Paths absent from the in-memory history set can't be tracked
+        # either - settle both answers without touching SQLite
+        if path not in self._get_history_paths():
+            return False, False
+
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT active FROM tracked_items WHERE path = ?', (path,))
         result = cursor.fetchone()
-        conn.close()
-        return result is not None
+        if result is None:
+            return False, False
+        return True, bool(result[0])
+
+    def is_tracked(self, path):
+        """Check if a path is actively tracked."""
+        return self.get_tracked_status(path)[1]
     
+    def _get_history_paths(self):
+        """Get the in-memory set of all paths known to history."""
+        if self._history_paths is None:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            cursor.execute('SELECT path FROM tracked_items')
+            self._history_paths = {row[0] for row in cursor.fetchall()}
+        return self._history_paths
+
     def path_exists_in_history(self, path):
         """Check if a path exists in any history."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            'SELECT 1 FROM tracked_items WHERE path = ?',
-            (path,)
-        )
-        result = cursor.fetchone()
-        conn.close()
-        return result is not None
+        # Forgetting a directory probes every file under it, and most
+        # have no history - answer from the set instead of per-path SQL
+        return path in self._get_history_paths()
     
     def get_tracked_items(self):
         """Get all actively tracked items."""
@@ -82,88 +259,241 @@ class DatabaseAccess:
         cursor = conn.cursor()
         cursor.execute('SELECT path FROM tracked_items WHERE active = 1')
         result = [row[0] for row in cursor.fetchall()]
-        conn.close()
         return result
     
-    def add_file_version(self, path, version, diff, content, timestamp):
+    def add_file_version(self, path, version, diff, content, timestamp, content_hash=None):
         """Add a file version."""
+        self._latest_cache.pop(path, None)
+        path_id = self._get_path_id(path, create=True)
         conn = self._get_connection()
         cursor = conn.cursor()
         cursor.execute(
-            'INSERT INTO file_versions (path, version, diff, content, timestamp) VALUES (?, ?, ?, ?, ?)',
-            (path, version, diff, content, timestamp)
+            'INSERT INTO file_versions (path_id, version, diff, content, timestamp, content_hash) VALUES (?, ?, ?, ?, ?, ?)',
+            (path_id, version, encode_payload(diff), encode_payload(content), timestamp, content_hash)
         )
         conn.commit()
-        conn.close()
-    
+
+    def add_file_versions_bulk(self, rows):
+        """
+        Add many file versions in a single transaction. Each row is a
+        (path, version, diff, content, timestamp, content_hash) tuple.
+        """
+        conn = self._get_connection()
+
+        # Resolve path ids up front; the generator would otherwise run
+        # its own statements while executemany is active
+        encoded_rows = []
+        for path, version, diff, content, timestamp, content_hash in rows:
+            self._latest_cache.pop(path, None)
+            encoded_rows.append((
+                self._get_path_id(path, create=True), version,
+                encode_payload(diff), encode_payload(content),
+                timestamp, content_hash
+            ))
+
+        cursor = conn.cursor()
+        cursor.executemany(
+            'INSERT INTO file_versions (path_id, version, diff, content, timestamp, content_hash) VALUES (?, ?, ?, ?, ?, ?)',
+            encoded_rows
+        )
+        conn.commit()
+
     def get_latest_version(self, path):
         """Get the latest version of a file."""
+        cached = self._latest_cache.get(path)
+        if cached is not None:
+            self._latest_cache.move_to_end(path)
+            # Copy so callers can add keys without polluting the cache
+            return dict(cached)
+
+        path_id = self._get_path_id(path)
+        if path_id is None:
+            return None
+
         conn = self._get_connection()
         cursor = conn.cursor()
         cursor.execute(
-            'SELECT version, diff, content, timestamp FROM file_versions WHERE path = ? ORDER BY version DESC LIMIT 1',
-            (path,)
+            'SELECT version, diff, content, timestamp FROM file_versions WHERE path_id = ? ORDER BY version DESC LIMIT 1',
+            (path_id,)
         )
         result = cursor.fetchone()
-        conn.close()
-        
+
         if result:
-            return {
+            row = {
                 'version': result[0],
-                'diff': result[1],
-                'content': result[2],
+                'diff': decode_payload(result[1]),
+                'content': decode_payload(result[2]),
                 'timestamp': result[3]
             }
+            self._latest_cache[path] = row
+            if len(self._latest_cache) > _LATEST_CACHE_SIZE:
+                self._latest_cache.popitem(last=False)
+            return dict(row)
         return None
+
+    def get_latest_version_meta(self, path):
+        """Get the latest version of a file without loading its content."""
+        path_id = self._get_path_id(path)
+        if path_id is None:
+            return None
+
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            'SELECT version, content_hash, timestamp FROM file_versions WHERE path_id = ? ORDER BY version DESC LIMIT 1',
+            (path_id,)
+        )
+        result = cursor.fetchone()
+
+        if result:
+            return {
+                'version': result[0],
+                'content_hash': result[1],
+                'timestamp': result[2]
+            }
+        return None
+
+    def get_latest_versions_bulk(self, paths):
+        """
+        Get the latest version of many files in one query, without
+        loading content. Returns a dict mapping path to version info;
+        paths with no history are absent.
+        """
+        results = {}
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        for start in range(0, len(paths), _MAX_QUERY_PARAMS):
+            batch = paths[start:start + _MAX_QUERY_PARAMS]
+            cursor.execute(
+                'SELECT p.path, MAX(v.version), v.content_hash, v.timestamp '
+                'FROM file_versions v JOIN paths p ON p.id = v.path_id '
+                f'WHERE p.path IN ({_placeholders(len(batch))}) GROUP BY v.path_id',
+                batch
+            )
+            for row in cursor.fetchall():
+                results[row[0]] = {
+                    'version': row[1],
+                    'content_hash': row[2],
+                    'timestamp': row[3]
+                }
+
+        return results
     
+    def get_version_at_or_before(self, path, timestamp):
+        """Get the latest version of a file at or before a timestamp."""
+        path_id = self._get_path_id(path)
+        if path_id is None:
+            return None
+
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            'SELECT version, timestamp FROM file_versions WHERE path_id = ? AND timestamp <= ? ORDER BY timestamp DESC LIMIT 1',
+            (path_id, timestamp)
+        )
+        result = cursor.fetchone()
+
+        if result:
+            return {
+                'version': result[0],
+                'timestamp': result[1]
+            }
+        return None
+
     def get_file_version(self, path, version):
         """Get a specific version of a file."""
+        path_id = self._get_path_id(path)
+        if path_id is None:
+            return None
+
         conn = self._get_connection()
         cursor = conn.cursor()
         cursor.execute(
-            'SELECT version, diff, content, timestamp FROM file_versions WHERE path = ? AND version = ?',
-            (path, version)
+            'SELECT version, diff, content, timestamp FROM file_versions WHERE path_id = ? AND version = ?',
+            (path_id, version)
         )
         result = cursor.fetchone()
-        conn.close()
         
         if result:
             return {
                 'version': result[0],
-                'diff': result[1],
-                'content': result[2],
+                'diff': decode_payload(result[1]),
+                'content': decode_payload(result[2]),
                 'timestamp': result[3]
             }
         return None
     
     def get_file_versions_up_to(self, path, version):
         """Get all versions of a file up to a specific version."""
+        path_id = self._get_path_id(path)
+        if path_id is None:
+            return []
+
         conn = self._get_connection()
         cursor = conn.cursor()
         cursor.execute(
-            'SELECT version, diff, content, timestamp FROM file_versions WHERE path = ? AND version <= ? ORDER BY version',
-            (path, version)
+            'SELECT version, diff, content, timestamp FROM file_versions WHERE path_id = ? AND version <= ? ORDER BY version',
+            (path_id, version)
         )
         results = cursor.fetchall()
-        conn.close()
         
         return [
             {
                 'version': row[0],
-                'diff': row[1],
-                'content': row[2],
+                'diff': decode_payload(row[1]),
+                'content': decode_payload(row[2]),
                 'timestamp': row[3]
             }
             for row in results
         ]
     
+    def get_versions_since_keyframe(self, path, target_version):
+        """
+        Get versions of a file up to a target version, starting from the
+        nearest version at or before it that stores full content.
+        """
+        path_id = self._get_path_id(path)
+        if path_id is None:
+            return []
+
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            'SELECT MAX(version) FROM file_versions WHERE path_id = ? AND version <= ? AND content IS NOT NULL',
+            (path_id, target_version)
+        )
+        result = cursor.fetchone()
+        start_version = result[0] if result and result[0] is not None else 1
+
+        cursor.execute(
+            'SELECT version, diff, content, timestamp FROM file_versions WHERE path_id = ? AND version >= ? AND version <= ? ORDER BY version',
+            (path_id, start_version, target_version)
+        )
+        results = cursor.fetchall()
+
+        return [
+            {
+                'version': row[0],
+                'diff': decode_payload(row[1]),
+                'content': decode_payload(row[2]),
+                'timestamp': row[3]
+            }
+            for row in results
+        ]
+
     def get_all_file_versions(self, path, limit=None):
         """Get all versions of a file, optionally limited."""
+        path_id = self._get_path_id(path)
+        if path_id is None:
+            return []
+
         conn = self._get_connection()
         cursor = conn.cursor()
-        
-        query = 'SELECT version, diff, content, timestamp FROM file_versions WHERE path = ? ORDER BY version DESC'
-        params = [path]
+
+        query = 'SELECT version, diff, content, timestamp FROM file_versions WHERE path_id = ? ORDER BY version DESC'
+        params = [path_id]
         
         if limit:
             query += ' LIMIT ?'
@@ -171,13 +501,12 @@ class DatabaseAccess:
         
         cursor.execute(query, params)
         results = cursor.fetchall()
-        conn.close()
         
         return [
             {
                 'version': row[0],
-                'diff': row[1],
-                'content': row[2],
+                'diff': decode_payload(row[1]),
+                'content': decode_payload(row[2]),
                 'timestamp': row[3]
             }
             for row in results
@@ -194,7 +523,6 @@ class DatabaseAccess:
         cursor = conn.cursor()
         cursor.execute('SELECT 1 FROM snapshots WHERE name = ?', (name,))
         result = cursor.fetchone()
-        conn.close()
         return result is not None
     
     def create_snapshot(self, name, note, timestamp):
@@ -206,7 +534,6 @@ class DatabaseAccess:
             (name, note, timestamp)
         )
         conn.commit()
-        conn.close()
     
     def add_snapshot_file(self, snapshot, path, version):
         """Add a file to a snapshot."""
@@ -217,15 +544,45 @@ class DatabaseAccess:
             (snapshot, path, version)
         )
         conn.commit()
-        conn.close()
-    
+
+    def add_snapshot_files(self, snapshot, items):
+        """
+        Add many (path, version) pairs to a snapshot in one transaction,
+        for callers that compute the versions in Python. Snapshots of the
+        latest state should use add_snapshot_files_from_latest instead.
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.executemany(
+            'INSERT INTO snapshot_files (snapshot, path, version) VALUES (?, ?, ?)',
+            ((snapshot, path, version) for path, version in items)
+        )
+        conn.commit()
+
+    def add_snapshot_files_from_latest(self, snapshot):
+        """
+        Snapshot the latest version of every actively tracked path that
+        has history, in a single INSERT ... SELECT. Only files ever get
+        version rows, so directories fall out of the join naturally.
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            'INSERT INTO snapshot_files (snapshot, path, version) '
+            'SELECT ?, p.path, MAX(v.version) FROM file_versions v '
+            'JOIN paths p ON p.id = v.path_id '
+            'JOIN tracked_items t ON t.path = p.path AND t.active = 1 '
+            'GROUP BY v.path_id',
+            (snapshot,)
+        )
+        conn.commit()
+
     def get_all_snapshots(self):
         """Get all snapshots."""
         conn = self._get_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT name, note, timestamp FROM snapshots ORDER BY timestamp DESC')
         results = cursor.fetchall()
-        conn.close()
         
         return [
             {
@@ -245,7 +602,6 @@ class DatabaseAccess:
             (name,)
         )
         results = cursor.fetchall()
-        conn.close()
         
         return [
             {
@@ -253,4 +609,27 @@ class DatabaseAccess:
                 'version': row[1]
             }
             for row in results
+        ]
+
+    def get_snapshot_file_versions(self, name):
+        """Get all files in a snapshot joined with their version rows."""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            'SELECT sf.path, sf.version, fv.diff, fv.content FROM snapshot_files sf '
+            'JOIN paths p ON p.path = sf.path '
+            'JOIN file_versions fv ON fv.path_id = p.id AND fv.version = sf.version '
+            'WHERE sf.snapshot = ?',
+            (name,)
+        )
+        results = cursor.fetchall()
+
+        return [
+            {
+                'path': row[0],
+                'version': row[1],
+                'diff': decode_payload(row[2]),
+                'content': decode_payload(row[3])
+            }
+            for row in results
         ]
\ No newline at end of file
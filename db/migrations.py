@@ -0,0 +1,43 @@
+"""
+Schema migrations for databases created by older versions of Chroni.
+"""
+
+def _column_names(cursor, table):
+    """Get the set of column names for a table."""
+    cursor.execute(f'PRAGMA table_info({table})')
+    return {row[1] for row in cursor.fetchall()}
+
+def run_migrations(conn):
+    """Apply any missing schema migrations to an existing database."""
+    cursor = conn.cursor()
+
+    # Added for hash-based change detection
+    if 'content_hash' not in _column_names(cursor, 'file_versions'):
+        cursor.execute('ALTER TABLE file_versions ADD COLUMN content_hash TEXT')
+
+    # file_versions used to key rows by the full path string; rebuild
+    # onto integer path ids (changing a primary key needs a new table)
+    if 'path' in _column_names(cursor, 'file_versions'):
+        cursor.execute(
+            'INSERT OR IGNORE INTO paths (path) SELECT DISTINCT path FROM file_versions'
+        )
+        cursor.execute('ALTER TABLE file_versions RENAME TO file_versions_old')
+        cursor.execute('''
+            CREATE TABLE file_versions (
+                path_id INTEGER REFERENCES paths(id),
+                version INTEGER,
+                diff TEXT,
+                content TEXT,
+                timestamp TEXT,
+                content_hash TEXT,
+                PRIMARY KEY (path_id, version)
+            )
+        ''')
+        cursor.execute('''
+            INSERT INTO file_versions (path_id, version, diff, content, timestamp, content_hash)
+            SELECT p.id, v.version, v.diff, v.content, v.timestamp, v.content_hash
+            FROM file_versions_old v JOIN paths p ON p.path = v.path
+        ''')
+        cursor.execute('DROP TABLE file_versions_old')
+
+    conn.commit()
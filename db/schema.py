@@ -4,8 +4,13 @@ Database schema initialization and management.
 
 import os
 import sqlite3
+from db.migrations import run_migrations
 from utils.paths import get_db_path
 
+# Bump whenever tables, indexes or migrations change, so unchanged
+# databases can skip the schema statements entirely
+SCHEMA_VERSION = 4
+
 def init_database():
     """Initialize the database with required tables."""
     db_path = get_db_path()
@@ -16,6 +21,13 @@ def init_database():
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
+    # Already at the current schema? One cheap pragma instead of
+    # re-running every CREATE statement on each invocation
+    cursor.execute('PRAGMA user_version')
+    if cursor.fetchone()[0] == SCHEMA_VERSION:
+        conn.close()
+        return
+
     # Create tables
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS tracked_items (
@@ -24,14 +36,24 @@ def init_database():
         )
     ''')
 
+    # Version rows reference paths by integer id so the (often long)
+    # path string is stored once, not once per version
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS paths (
+            id INTEGER PRIMARY KEY,
+            path TEXT UNIQUE NOT NULL
+        )
+    ''')
+
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS file_versions (
-            path TEXT,
+            path_id INTEGER REFERENCES paths(id),
             version INTEGER,
             diff TEXT,
             content TEXT,
             timestamp TEXT,
-            PRIMARY KEY (path, version)
+            content_hash TEXT,
+            PRIMARY KEY (path_id, version)
         )
     ''')
 
@@ -53,5 +75,21 @@ def init_database():
         )
     ''')
 
+    # Bring databases from older versions up to date before touching
+    # indexes, since migrations may rebuild file_versions
+    run_migrations(conn)
+
+    # Create indexes
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_file_versions_path_timestamp
+        ON file_versions (path_id, timestamp)
+    ''')
+
+    # Refresh planner statistics whenever the schema changes, so the
+    # composite primary keys actually get picked for range scans
+    cursor.execute('ANALYZE')
+
+    cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
     conn.commit()
     conn.close()
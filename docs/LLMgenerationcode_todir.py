@@ -10,9 +10,11 @@ Usage: python generate_codebase.py <input_file> [output_directory]
 
 import os
 import sys
-import re
 from pathlib import Path
 
+# File markers look like "# File: path/to/file.py"
+_FILE_MARKER = '# File: '
+
 def parse_multifile_content(content):
     """
     Parse the multi-file content and extract individual files.
@@ -25,16 +27,14 @@ def parse_multifile_content(content):
     lines = content.split('\n')
     
     for line in lines:
-        # Look for file markers like "# File: path/to/file.py"
-        file_match = re.match(r'^# File: (.+)$', line)
-        
-        if file_match:
+        # A fixed-prefix check beats a regex in this per-line loop
+        if line.startswith(_FILE_MARKER) and len(line) > len(_FILE_MARKER):
             # Save previous file if exists
             if current_file:
                 files[current_file] = '\n'.join(current_content)
-            
+
             # Start new file
-            current_file = file_match.group(1)
+            current_file = line[len(_FILE_MARKER):]
             current_content = []
         else:
             # Add line to current file content
@@ -50,16 +50,17 @@ def parse_multifile_content(content):
 def clean_content(content):
     """Clean up the content by removing leading/trailing whitespace and empty lines at start/end."""
     lines = content.split('\n')
-    
-    # Remove empty lines at the beginning
-    while lines and not lines[0].strip():
-        lines.pop(0)
-    
-    # Remove empty lines at the end
-    while lines and not lines[-1].strip():
-        lines.pop()
-    
-    return '\n'.join(lines)
+
+    # Find the first and last non-blank lines instead of popping from
+    # the front of the list, which shifts every element each time
+    start = 0
+    end = len(lines)
+    while start < end and not lines[start].strip():
+        start += 1
+    while end > start and not lines[end - 1].strip():
+        end -= 1
+
+    return '\n'.join(lines[start:end])
 
 def create_directory_structure(base_dir, files):
     """Create the directory structure for all files."""
@@ -74,14 +75,11 @@ def write_files(base_dir, files):
     """Write all files to their respective locations."""
     for file_path, content in files.items():
         full_path = os.path.join(base_dir, file_path)
-        
-        # Clean the content
-        cleaned_content = clean_content(content)
-        
-        # Write the file
+
+        # Content arrives already cleaned
         with open(full_path, 'w', encoding='utf-8') as f:
-            f.write(cleaned_content)
-        
+            f.write(content)
+
         print(f"Created: {file_path}")
 
 def make_executable(base_dir, files):
@@ -100,7 +98,7 @@ def validate_python_syntax(base_dir, files):
     for file_path, content in files.items():
         if file_path.endswith('.py'):
             try:
-                ast.parse(clean_content(content))
+                ast.parse(content)
                 print(f"✓ Syntax valid: {file_path}")
             except SyntaxError as e:
                 print(f"✗ Syntax error in {file_path}: {e}")
@@ -121,9 +119,11 @@ def main():
         print(f"Error: Input file '{input_file}' not found.")
         sys.exit(1)
     
-    # Parse the multi-file content
+    # Parse the multi-file content and clean each file once, so the
+    # write and validation passes don't re-scan the same strings
     files = parse_multifile_content(content)
-    
+    files = {path: clean_content(body) for path, body in files.items()}
+
     if not files:
         print("No files found in the input. Make sure the format is correct.")
         sys.exit(1)
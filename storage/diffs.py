@@ -3,71 +3,177 @@ Diff creation and application functionality.
 """
 
 import difflib
+import re
+
+# Hunk headers sit at the start of a line; only the old-range start and
+# length are needed to locate the hunk in the original content
+_HUNK_HEADER = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+\d+(?:,\d+)? @@\n?', re.MULTILINE)
+
+# Both ranges, for rewriting headers of diffs computed on a slice
+_HUNK_RANGES = re.compile(r'^@@ -(\d+)((?:,\d+)?) \+(\d+)((?:,\d+)?) @@$', re.MULTILINE)
+
+# Context lines emitted around each hunk
+_CONTEXT_LINES = 3
+
+# Block size for the character-level common prefix/suffix probes
+_PROBE_BLOCK = 1 << 16
+
+def _common_prefix_chars(old, new):
+    """
+    Length of the longest common character prefix. Compares whole
+    blocks (C memcmp) and bisects the first differing one, instead of
+    walking characters in Python.
+    """
+    limit = min(len(old), len(new))
+    i = 0
+    while i < limit:
+        j = min(i + _PROBE_BLOCK, limit)
+        if old[i:j] == new[i:j]:
+            i = j
+            continue
+        lo, hi = i, j
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if old[i:mid] == new[i:mid]:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo
+    return limit
+
+def _common_suffix_chars(old, new, limit):
+    """Length of the longest common character suffix, capped at limit."""
+    i = 0
+    while i < limit:
+        j = min(i + _PROBE_BLOCK, limit)
+        if old[len(old) - j:len(old) - i] == new[len(new) - j:len(new) - i]:
+            i = j
+            continue
+        lo, hi = i, j
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if old[len(old) - mid:len(old) - i] == new[len(new) - mid:len(new) - i]:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo
+    return limit
 
 class DiffStorage:
     def create_diff(self, old_content, new_content):
         """Create a unified diff between two content strings."""
-        old_lines = old_content.splitlines(keepends=True)
-        new_lines = new_content.splitlines(keepends=True)
-        
+        if old_content == new_content:
+            return ''
+
+        # Matching head and tail can't appear in any hunk, so find them
+        # at the character level - before anything is split into lines -
+        # and hand the matcher only the edited middle (plus context).
+        # For a small edit in a large file neither the cost of the
+        # matcher nor the per-line string allocations track file size.
+        old_len = len(old_content)
+        new_len = len(new_content)
+
+        prefix = _common_prefix_chars(old_content, new_content)
+        head = old_content.rfind('\n', 0, prefix) + 1
+        for _ in range(_CONTEXT_LINES):
+            if head == 0:
+                break
+            head = old_content.rfind('\n', 0, head - 1) + 1
+
+        suffix = _common_suffix_chars(
+            old_content, new_content, min(old_len, new_len) - head
+        )
+        # The kept tail must begin on a line boundary, then give back
+        # context lines to the middle
+        tail_start = old_len
+        if suffix:
+            newline = old_content.find('\n', old_len - suffix)
+            if newline != -1:
+                tail_start = newline + 1
+                for _ in range(_CONTEXT_LINES):
+                    newline = old_content.find('\n', tail_start)
+                    if newline == -1:
+                        tail_start = old_len
+                        break
+                    tail_start = newline + 1
+
+        tail = old_len - tail_start
+
         diff = difflib.unified_diff(
-            old_lines,
-            new_lines,
+            old_content[head:tail_start].splitlines(keepends=True),
+            new_content[head:new_len - tail].splitlines(keepends=True),
             fromfile='old',
-            tofile='new',
-            lineterm=''
+            tofile='new'
         )
-        
-        return ''.join(diff)
-    
+
+        # A final line without a newline would otherwise glue onto the
+        # next diff line; terminate it and flag it the way patch does
+        out = []
+        for line in diff:
+            if line.endswith('\n'):
+                out.append(line)
+            else:
+                out.append(line + '\n')
+                out.append('\\ No newline at end of file\n')
+        text = ''.join(out)
+
+        offset = old_content.count('\n', 0, head)
+        if offset:
+            text = _HUNK_RANGES.sub(
+                lambda m: '@@ -%d%s +%d%s @@' % (
+                    int(m.group(1)) + offset, m.group(2),
+                    int(m.group(3)) + offset, m.group(4)
+                ),
+                text
+            )
+        return text
+
     def apply_diff(self, original_content, diff):
         """Apply a unified diff to original content."""
+        if not diff:
+            return original_content
+
+        # Older diffs were stored with the file headers glued onto the
+        # first hunk header; strip them so it sits at the line start
+        if diff.startswith('--- old+++ new@@'):
+            diff = diff[len('--- old+++ new'):]
+
         original_lines = original_content.splitlines(keepends=True)
-        
-        # Parse the diff
-        patch = difflib.unified_diff.__doc__  # This is just to import the module
-        # We need to manually parse and apply the unified diff
-        
-        diff_lines = diff.splitlines()
-        new_lines = []
-        i = 0
+        headers = list(_HUNK_HEADER.finditer(diff))
+        result = []
         original_idx = 0
-        
-        while i < len(diff_lines):
-            line = diff_lines[i]
-            
-            if line.startswith('@@'):
-                # Parse hunk header
-                parts = line.split()
-                if len(parts) >= 3:
-                    old_range = parts[1][1:]  # Remove the '-'
-                    if ',' in old_range:
-                        start, count = map(int, old_range.split(','))
-                    else:
-                        start, count = int(old_range), 1
-                    
-                    # Adjust for 0-based indexing
-                    original_idx = start - 1
-                
-            elif line.startswith(' '):
-                # Context line - copy from original
-                if original_idx < len(original_lines):
-                    new_lines.append(original_lines[original_idx])
+
+        for pos, header in enumerate(headers):
+            start = int(header.group(1))
+            length = header.group(2)
+
+            # A zero-length old range means "insert after this line";
+            # otherwise the 1-based start names the first hunk line
+            hunk_start = start if length == '0' else start - 1
+
+            # Lines between hunks are untouched - copy them through
+            result.extend(original_lines[original_idx:hunk_start])
+            original_idx = hunk_start
+
+            end = headers[pos + 1].start() if pos + 1 < len(headers) else len(diff)
+            emitted = False
+            for line in diff[header.end():end].splitlines(keepends=True):
+                if line.startswith('+'):
+                    result.append(line[1:])
+                    emitted = True
+                elif line.startswith('-'):
                     original_idx += 1
-                
-            elif line.startswith('-'):
-                # Deleted line - skip in original
-                original_idx += 1
-                
-            elif line.startswith('+'):
-                # Added line - add to new content
-                new_lines.append(line[1:] + '\n')
-            
-            i += 1
-        
-        # Add any remaining original lines
-        while original_idx < len(original_lines):
-            new_lines.append(original_lines[original_idx])
-            original_idx += 1
-        
-        return ''.join(new_lines)
\ No newline at end of file
+                    emitted = False
+                elif line.startswith(' '):
+                    # Take context from the original, which keeps exact
+                    # line endings even at end of file
+                    result.append(original_lines[original_idx])
+                    original_idx += 1
+                    emitted = True
+                elif line.startswith('\\') and emitted:
+                    # "No newline at end of file": drop the newline the
+                    # preceding output line was stored with
+                    result[-1] = result[-1].rstrip('\n')
+
+        result.extend(original_lines[original_idx:])
+        return ''.join(result)
@@ -4,6 +4,25 @@ File storage and reading functionality.
 
 import os
 
+# Extensions that settle the text-or-binary question up front, so the
+# common cases skip the probe reads entirely; anything unlisted still
+# gets probed
+_TEXT_EXTENSIONS = {
+    '.py', '.js', '.ts', '.jsx', '.tsx', '.c', '.h', '.cpp', '.hpp',
+    '.java', '.go', '.rs', '.rb', '.php', '.sh', '.pl', '.lua', '.sql',
+    '.html', '.htm', '.css', '.xml', '.json', '.yaml', '.yml', '.toml',
+    '.ini', '.cfg', '.conf', '.md', '.rst', '.txt', '.csv', '.tsv',
+    '.tex', '.log',
+}
+_BINARY_EXTENSIONS = {
+    '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.webp', '.pdf',
+    '.zip', '.tar', '.gz', '.bz2', '.xz', '.7z', '.rar', '.whl',
+    '.so', '.dll', '.dylib', '.a', '.o', '.pyc', '.pyo', '.class',
+    '.exe', '.bin', '.db', '.sqlite', '.sqlite3',
+    '.mp3', '.mp4', '.avi', '.mkv', '.wav', '.ogg', '.flac',
+    '.ttf', '.otf', '.woff', '.woff2', '.eot',
+}
+
 class FileStorage:
     def read_file(self, path):
         """Read a text file and return its content."""
@@ -23,17 +42,28 @@ class FileStorage:
     
     def write_file(self, path, content):
         """Write content to a file."""
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        # Restoring many files hits the same directories over and over;
+        # only fall back to makedirs when the open actually fails
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
     
     def is_text_file(self, path):
         """Check if a file is a text file."""
+        ext = os.path.splitext(path)[1].lower()
+        if ext in _BINARY_EXTENSIONS:
+            return False
+
         if not os.path.isfile(path):
             return False
-        
+
+        if ext in _TEXT_EXTENSIONS:
+            return True
+
         try:
             with open(path, 'rb') as f:
                 chunk = f.read(1024)
@@ -0,0 +1,68 @@
+"""
+On-disk payload encoding for stored content and diffs.
+
+Text payloads are compressed before they reach SQLite and decompressed
+transparently on read, shrinking BLOB traffic on both paths. Each
+encoded payload starts with a one-byte codec tag; plain TEXT rows
+written by older versions pass through decode_payload unchanged.
+
+zstandard is used when installed (much faster at similar ratios);
+otherwise writes fall back to zlib. Reads always handle both.
+"""
+
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+_RAW = 0x00
+_ZLIB = 0x01
+_ZSTD = 0x02
+
+# Tiny payloads grow when compressed; store them as-is
+_MIN_COMPRESS_SIZE = 64
+
+if zstandard is not None:
+    _compressor = zstandard.ZstdCompressor(level=3)
+    _decompressor = zstandard.ZstdDecompressor()
+
+def _compress(data):
+    """Compress data with the best codec available, returning (tag, bytes)."""
+    if zstandard is not None:
+        return _ZSTD, _compressor.compress(data)
+    return _ZLIB, zlib.compress(data, 6)
+
+def encode_payload(text):
+    """Encode a text payload for storage, compressing when worthwhile."""
+    if text is None:
+        return None
+
+    data = text.encode('utf-8')
+
+    if len(data) >= _MIN_COMPRESS_SIZE:
+        tag, compressed = _compress(data)
+        if len(compressed) + 1 < len(data):
+            return bytes([tag]) + compressed
+
+    return bytes([_RAW]) + data
+
+def decode_payload(value):
+    """Decode a stored payload back to text."""
+    if value is None or isinstance(value, str):
+        return value
+
+    tag = value[0]
+    data = value[1:]
+
+    if tag == _ZLIB:
+        data = zlib.decompress(data)
+    elif tag == _ZSTD:
+        if zstandard is None:
+            raise RuntimeError(
+                'payload was written with zstandard, which is not installed'
+            )
+        data = _decompressor.decompress(data)
+
+    return data.decode('utf-8')
@@ -0,0 +1,39 @@
+"""
+Content hashing utilities for fast change detection.
+
+blake3 is used when installed (SIMD-accelerated, multi-GB/s); otherwise
+hashing falls back to the stdlib blake2b. Digests from the two backends
+differ, but a digest mismatch only makes the scanner fall back to a
+content comparison, so switching backends never fabricates versions.
+"""
+
+import hashlib
+
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+_CHUNK_SIZE = 1 << 20
+
+def _new_hasher():
+    if blake3 is not None:
+        return blake3.blake3()
+    return hashlib.blake2b(digest_size=32)
+
+def hash_content(content):
+    """Hash text content and return the hex digest."""
+    hasher = _new_hasher()
+    hasher.update(content.encode('utf-8'))
+    return hasher.hexdigest()
+
+def hash_file(path):
+    """
+    Hash a file's raw bytes in chunks and return the hex digest, without
+    holding more than one chunk in memory at a time.
+    """
+    hasher = _new_hasher()
+    with open(path, 'rb') as f:
+        while chunk := f.read(_CHUNK_SIZE):
+            hasher.update(chunk)
+    return hasher.hexdigest()
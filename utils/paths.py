@@ -1,11 +1,19 @@
 """
 Path manipulation and resolution utilities with config file support.
 """
+import copy
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from storage.files import FileStorage
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Default configuration
 DEFAULT_CONFIG = {
     "app_dir": "~/.chroni",
@@ -19,19 +27,23 @@ def get_config_path():
     config_dir = os.path.join(home_dir, '.chroni')
     return os.path.join(config_dir, 'config.json')
 
-def load_config():
-    """Load configuration from file, create with defaults if not exists."""
+@lru_cache(maxsize=1)
+def _load_config_cached():
+    """Read and parse the config file once per process."""
     config_path = get_config_path()
 
     if os.path.exists(config_path):
         try:
-            with open(config_path, 'r') as f:
-                config = json.load(f)
+            with open(config_path, 'rb') as f:
+                raw = f.read()
+            # orjson parses in C when installed; ValueError covers the
+            # decode errors of both parsers
+            config = orjson.loads(raw) if orjson is not None else json.loads(raw)
             # Merge with defaults to ensure all keys exist
             merged_config = DEFAULT_CONFIG.copy()
             merged_config.update(config)
             return merged_config
-        except (json.JSONDecodeError, IOError):
+        except (ValueError, IOError):
             # If config is corrupted, fall back to defaults
             return DEFAULT_CONFIG.copy()
     else:
@@ -39,6 +51,12 @@ def load_config():
         save_config(DEFAULT_CONFIG)
         return DEFAULT_CONFIG.copy()
 
+def load_config():
+    """Load configuration from file, create with defaults if not exists."""
+    # The parse is cached; hand out a deep copy so callers that mutate
+    # the dict (or its lists) can't poison later loads
+    return copy.deepcopy(_load_config_cached())
+
 def save_config(config):
     """Save configuration to file."""
     config_path = get_config_path()
@@ -48,11 +66,18 @@ def save_config(config):
     os.makedirs(config_dir, exist_ok=True)
 
     try:
-        with open(config_path, 'w') as f:
-            json.dump(config, f, indent=2)
+        if orjson is not None:
+            with open(config_path, 'wb') as f:
+                f.write(orjson.dumps(config, option=orjson.OPT_INDENT_2))
+        else:
+            with open(config_path, 'w') as f:
+                json.dump(config, f, indent=2)
     except IOError as e:
         print(f"Warning: Could not save config file: {e}")
 
+    # The next load must see what was just written
+    _load_config_cached.cache_clear()
+
 def resolve_path(path):
     """Resolve a path to absolute path."""
     return os.path.abspath(os.path.expanduser(path))
@@ -77,21 +102,58 @@ def get_excluded_dirs():
     config = load_config()
     return config.get('excluded_dirs', DEFAULT_CONFIG['excluded_dirs'])
 
+# (mtime_ns, size) -> is-text verdict per path; a file that has not
+# changed since the last walk can't have changed kind, so repeat walks
+# (watcher events, scans) skip the two probe opens per file
+_text_file_cache = {}
+
 def get_text_files_in_directory(directory):
     """Get all text files in a directory recursively, excluding configured directories."""
     file_storage = FileStorage()
-    text_files = []
-    excluded_dirs = get_excluded_dirs()
-
-    for root, dirs, files in os.walk(directory):
-        # Skip excluded directories
-        dirs[:] = [d for d in dirs if d not in excluded_dirs]
-
-        for file in files:
-            file_path = os.path.join(root, file)
-            if file_storage.is_text_file(file_path):
-                text_files.append(file_path)
-    return text_files
+    excluded_dirs = set(get_excluded_dirs())
+    # (path, stat key, verdict or None when it still needs probing)
+    candidates = []
+
+    def walk(dir_path):
+        try:
+            entries = os.scandir(dir_path)
+        except OSError:
+            return
+
+        with entries:
+            for entry in entries:
+                # DirEntry caches the dirent type, so these checks need
+                # no extra stat syscall per entry
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in excluded_dirs:
+                        walk(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    try:
+                        stat = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    stat_key = (stat.st_mtime_ns, stat.st_size)
+                    cached = _text_file_cache.get(entry.path)
+                    verdict = cached[1] if cached is not None and cached[0] == stat_key else None
+                    candidates.append((entry.path, stat_key, verdict))
+
+    walk(directory)
+
+    # Probe uncached files on a thread pool: each probe blocks on two
+    # opens, so overlapping them hides per-file latency
+    to_probe = [i for i, (_, _, verdict) in enumerate(candidates) if verdict is None]
+    if to_probe:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            verdicts = executor.map(
+                file_storage.is_text_file,
+                (candidates[i][0] for i in to_probe)
+            )
+            for i, verdict in zip(to_probe, verdicts):
+                path, stat_key, _ = candidates[i]
+                _text_file_cache[path] = (stat_key, verdict)
+                candidates[i] = (path, stat_key, verdict)
+
+    return [path for path, _, verdict in candidates if verdict]
 
 def update_config(**kwargs):
     """Update specific configuration values."""
@@ -3,13 +3,17 @@ Time and timestamp utilities.
 """
 
 from datetime import datetime
+from functools import lru_cache
 
 def get_timestamp():
     """Get current timestamp as string."""
     return datetime.now().isoformat()
 
+@lru_cache(maxsize=4096)
 def format_timestamp(timestamp):
     """Format timestamp for display."""
+    # The same timestamp string always formats the same way, and
+    # history listings format each one repeatedly - cache the result
     try:
         dt = datetime.fromisoformat(timestamp)
         return dt.strftime('%Y-%m-%d %H:%M:%S')
@@ -21,16 +25,9 @@ def parse_date(date_str):
     Parse date string in various formats and return datetime object.
     Supports: YYYY-MM-DD, YYYY-MM-DD HH:MM, YYYY-MM-DD HH:MM:SS
     """
-    formats = [
-        '%Y-%m-%d %H:%M:%S',
-        '%Y-%m-%d %H:%M',
-        '%Y-%m-%d'
-    ]
-    
-    for fmt in formats:
-        try:
-            return datetime.strptime(date_str, fmt)
-        except ValueError:
-            continue
-    
-    return None
\ No newline at end of file
+    # fromisoformat accepts all the supported formats and runs in C,
+    # unlike strptime which recompiles its format string in Python
+    try:
+        return datetime.fromisoformat(date_str)
+    except ValueError:
+        return None
\ No newline at end of file